@@ -15,16 +15,18 @@ import requests
 from requests.exceptions import ConnectionError
 from dotenv import load_dotenv
 from sklearn.linear_model import LinearRegression
+from serving import BoundedExecutor, Overloaded, overloaded_response, cors_origins, env_int, env_float
+from event_store import EventStore, NS_PER_HOUR
+from timeseries import analyze_timeseries_windows, DEFAULT_WINDOW, DEFAULT_MAX_POINTS, DEFAULT_MAX_STEPS, DEFAULT_ANOMALY_THRESHOLD
+from preprocessing import read_dataframe, save_dataframe, summarize_dataframe, process_data, ingest_batch
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
 # Configure CORS to allow requests from any localhost port
-CORS(app, resources={r"/api/*": {"origins": [
-    "http://localhost:3000",
-    os.getenv('FRONTEND_URL', 'http://localhost:3000')
-]}})
+# Retry-After is exposed so the frontend can read it on 429/503 responses
+CORS(app, resources={r"/api/*": {"origins": cors_origins()}}, expose_headers=['Retry-After'])
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -63,6 +65,37 @@ app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024
 # Allowed file extensions
 ALLOWED_EXTENSIONS = set(os.getenv('ALLOWED_EXTENSIONS', 'csv,json,xls,xlsx').split(','))
 
+# Bounded executors so slow inference and CPU-heavy parsing are rejected instead of queueing without limit
+RETRY_AFTER_SECONDS = env_int('RETRY_AFTER_SECONDS', 1)
+inference_executor = BoundedExecutor(
+    'inference',
+    max_workers=env_int('INFERENCE_WORKERS', 1),
+    max_queue=env_int('INFERENCE_QUEUE', 4),
+    timeout=env_float('INFERENCE_TIMEOUT', 30),
+    retry_after=RETRY_AFTER_SECONDS,
+)
+cpu_executor = BoundedExecutor(
+    'cpu',
+    max_workers=env_int('CPU_WORKERS', 2),
+    max_queue=env_int('CPU_QUEUE', 4),
+    timeout=env_float('CPU_TIMEOUT', 60),
+    retry_after=RETRY_AFTER_SECONDS,
+)
+# A batch of up to MAX_BATCH_FILES files takes far longer than one file, so batches get
+# their own slots and timeout instead of sharing CPU_TIMEOUT
+batch_executor = BoundedExecutor(
+    'batch',
+    max_workers=env_int('BATCH_CONCURRENCY', 1),
+    timeout=env_float('BATCH_TIMEOUT', 600),
+    retry_after=RETRY_AFTER_SECONDS,
+)
+
+# Parallel preprocessing: workers per file for column transforms, files processed at once per batch
+PREPROCESS_WORKERS = env_int('PREPROCESS_WORKERS', 1)
+BATCH_WORKERS = env_int('BATCH_WORKERS', os.cpu_count() or 1)
+MAX_BATCH_FILES = env_int('MAX_BATCH_FILES', 20)
+PARALLEL_BACKEND = os.getenv('PARALLEL_BACKEND', 'thread')
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -89,76 +122,6 @@ def get_embeddings(text):
         embedding = np.random.randn(1, 768)
         return embedding.tolist()
 
-def process_data(df, preprocessing_steps):
-    """Process the data according to specified preprocessing steps"""
-    try:
-        # Make a copy of the DataFrame to avoid modifying the original
-        df_processed = df.copy()
-        
-        # Handle missing values
-        if preprocessing_steps.get('handle_missing'):
-            strategy = preprocessing_steps['handle_missing'].get('strategy', 'mean')
-            if strategy == 'mean':
-                df_processed = df_processed.fillna(df_processed.mean())
-            elif strategy == 'median':
-                df_processed = df_processed.fillna(df_processed.median())
-            elif strategy == 'mode':
-                df_processed = df_processed.fillna(df_processed.mode().iloc[0])
-            elif strategy == 'drop':
-                df_processed = df_processed.dropna()
-        
-        # Handle outliers
-        if preprocessing_steps.get('handle_outliers'):
-            method = preprocessing_steps['handle_outliers'].get('method', 'zscore')
-            threshold = preprocessing_steps['handle_outliers'].get('threshold', 3)
-            
-            numeric_columns = df_processed.select_dtypes(include=[np.number]).columns
-            
-            if method == 'zscore':
-                for col in numeric_columns:
-                    z_scores = np.abs((df_processed[col] - df_processed[col].mean()) / df_processed[col].std())
-                    df_processed = df_processed[z_scores < threshold]
-            elif method == 'iqr':
-                for col in numeric_columns:
-                    Q1 = df_processed[col].quantile(0.25)
-                    Q3 = df_processed[col].quantile(0.75)
-                    IQR = Q3 - Q1
-                    df_processed = df_processed[
-                        (df_processed[col] >= Q1 - 1.5 * IQR) & 
-                        (df_processed[col] <= Q3 + 1.5 * IQR)
-                    ]
-        
-        # Normalize/Scale data
-        if preprocessing_steps.get('normalize'):
-            method = preprocessing_steps['normalize'].get('method', 'minmax')
-            numeric_columns = df_processed.select_dtypes(include=[np.number]).columns
-            
-            if method == 'minmax':
-                for col in numeric_columns:
-                    df_processed[col] = (df_processed[col] - df_processed[col].min()) / (df_processed[col].max() - df_processed[col].min())
-            elif method == 'standard':
-                for col in numeric_columns:
-                    df_processed[col] = (df_processed[col] - df_processed[col].mean()) / df_processed[col].std()
-        
-        # Encode categorical variables
-        if preprocessing_steps.get('encode_categorical'):
-            method = preprocessing_steps['encode_categorical'].get('method', 'onehot')
-            categorical_columns = df_processed.select_dtypes(include=['object']).columns
-            
-            if method == 'onehot':
-                df_processed = pd.get_dummies(df_processed, columns=categorical_columns)
-            elif method == 'label':
-                for col in categorical_columns:
-                    df_processed[col] = df_processed[col].astype('category').cat.codes
-        
-        # Convert to dictionary format for JSON serialization
-        result = df_processed.to_dict(orient='records')
-        return result
-        
-    except Exception as e:
-        logger.error(f"Error in process_data: {str(e)}")
-        raise Exception(f"Error processing data: {str(e)}")
-
 @app.route('/api/ingest-data', methods=['POST'])
 def ingest_data():
     try:
@@ -184,45 +147,24 @@ def ingest_data():
 
         # Read the file based on its type
         try:
-            if data_type == 'csv':
-                df = pd.read_csv(filepath)
-            elif data_type == 'json':
-                # Read JSON file with proper handling
-                with open(filepath, 'r') as f:
-                    json_data = json.load(f)
-                
-                # Convert JSON data to DataFrame
-                if isinstance(json_data, list):
-                    # If JSON is a list of objects
-                    df = pd.DataFrame(json_data)
-                elif isinstance(json_data, dict):
-                    # If JSON is a single object
-                    df = pd.DataFrame([json_data])
-                else:
-                    return jsonify({'error': 'Invalid JSON format. Expected a list of objects or a single object.'}), 400
-                
-                # Ensure all required columns are present
-                if df.empty:
-                    return jsonify({'error': 'No data found in JSON file.'}), 400
-                
-                # Log the DataFrame structure
-                logger.info(f"DataFrame columns: {df.columns.tolist()}")
-                logger.info(f"DataFrame shape: {df.shape}")
-                
-            elif data_type in ['xls', 'xlsx']:
-                df = pd.read_excel(filepath)
-            else:
-                return jsonify({'error': 'Unsupported file type'}), 400
+            df = cpu_executor.run(read_dataframe, filepath, data_type)
+        except Overloaded as e:
+            return overloaded_response(e)
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {str(e)}")
             return jsonify({'error': f'Invalid JSON format: {str(e)}'}), 400
+        except ValueError as e:
+            logger.error(f"Error reading file: {str(e)}")
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
             logger.error(f"Error reading file: {str(e)}")
             return jsonify({'error': f'Error reading file: {str(e)}'}), 400
 
         # Process the data
         try:
-            processed_data = process_data(df, preprocessing_steps)
+            processed_data = cpu_executor.run(process_data, df, preprocessing_steps, PREPROCESS_WORKERS, PARALLEL_BACKEND)
+        except Overloaded as e:
+            return overloaded_response(e)
         except Exception as e:
             logger.error(f"Error processing data: {str(e)}")
             return jsonify({'error': f'Error processing data: {str(e)}'}), 500
@@ -234,27 +176,13 @@ def ingest_data():
         try:
             # Convert processed data back to DataFrame with proper index
             df_processed = pd.DataFrame(processed_data)
-            
-            if data_type == 'csv':
-                df_processed.to_csv(processed_filepath, index=False)
-            elif data_type == 'json':
-                df_processed.to_json(processed_filepath, orient='records')
-            elif data_type in ['xls', 'xlsx']:
-                df_processed.to_excel(processed_filepath, index=False)
+            save_dataframe(df_processed, processed_filepath, data_type)
         except Exception as e:
             logger.error(f"Error saving processed file: {str(e)}")
             return jsonify({'error': f'Error saving processed file: {str(e)}'}), 500
 
         # Return summary statistics
-        summary = {
-            'original_rows': len(df),
-            'processed_rows': len(df_processed),
-            'columns': list(df_processed.columns),
-            'numeric_columns': list(df_processed.select_dtypes(include=[np.number]).columns),
-            'categorical_columns': list(df_processed.select_dtypes(include=['object']).columns),
-            'missing_values': df_processed.isnull().sum().to_dict(),
-            'file_path': processed_filepath
-        }
+        summary = summarize_dataframe(df, df_processed, processed_filepath)
 
         return jsonify({
             'message': 'Data processed successfully',
@@ -265,6 +193,57 @@ def ingest_data():
         logger.error(f"Error in data ingestion: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ingest-batch', methods=['POST'])
+def ingest_batch_endpoint():
+    try:
+        files = request.files.getlist('files')
+        if not files:
+            return jsonify({'error': 'No files provided'}), 400
+
+        if len(files) > MAX_BATCH_FILES:
+            return jsonify({'error': f'Too many files. At most {MAX_BATCH_FILES} files per batch'}), 400
+
+        for file in files:
+            if file.filename == '':
+                return jsonify({'error': 'No file selected'}), 400
+            if not allowed_file(file.filename):
+                return jsonify({'error': f'File type not allowed: {file.filename}'}), 400
+
+        preprocessing_steps = json.loads(request.form.get('preprocessing', '{}'))
+
+        # Save every file first, then read and process them in parallel
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        jobs = []
+        for index, file in enumerate(files):
+            filename = secure_filename(file.filename)
+            saved_filename = f"{timestamp}_{index}_{filename}"
+            filepath = os.path.join(app.config['UPLOAD_FOLDER'], saved_filename)
+            file.save(filepath)
+            jobs.append({
+                'filename': file.filename,
+                'args': {
+                    'filepath': filepath,
+                    # Batches may mix formats, so the type comes from each file's extension
+                    'data_type': filename.rsplit('.', 1)[1].lower(),
+                    'preprocessing_steps': preprocessing_steps,
+                    'processed_filepath': os.path.join(app.config['UPLOAD_FOLDER'], f"processed_{saved_filename}")
+                }
+            })
+
+        results = batch_executor.run(ingest_batch, jobs, BATCH_WORKERS, PARALLEL_BACKEND)
+        processed = sum(1 for result in results if 'summary' in result)
+
+        return jsonify({
+            'message': f'Processed {processed} of {len(results)} files',
+            'results': results
+        })
+
+    except Overloaded as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"Error in batch ingestion: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/analyze', methods=['POST'])
 def analyze_text():
     try:
@@ -275,7 +254,7 @@ def analyze_text():
             return jsonify({'error': 'No text provided'}), 400
         
         # Get embeddings
-        embeddings = get_embeddings(text)
+        embeddings = inference_executor.run(get_embeddings, text)
         
         # Calculate some basic statistics
         embedding_array = np.array(embeddings)
@@ -290,82 +269,59 @@ def analyze_text():
             }
         })
     
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
 def analyze_timeseries(data):
-    """Analyze time series data for bottlenecks and anomalies"""
+    """Analyze time series data for bottlenecks and anomalies.
+
+    ``data`` is a list of event dicts or an ``EventStore``.
+    """
     try:
-        # Validate input data
-        if not isinstance(data, list):
-            raise ValueError("Input data must be a list of objects")
-        
-        # Validate each item in the data
-        for item in data:
-            if not isinstance(item, dict):
-                raise ValueError("Each item must be a dictionary")
-            if 'timestamp' not in item:
-                raise ValueError("Each item must have a 'timestamp' field")
-            if 'step' not in item:
-                raise ValueError("Each item must have a 'step' field")
-            if 'delay' not in item:
-                raise ValueError("Each item must have a 'delay' field")
-            
-            # Convert delay to float if it's a string
-            if isinstance(item['delay'], str):
-                try:
-                    item['delay'] = float(item['delay'])
-                except ValueError:
-                    raise ValueError(f"Delay value '{item['delay']}' cannot be converted to a number")
+        # Load events into the column store; the caller's list is left untouched and its
+        # delays are kept in float64 so results match the values that were sent
+        events = data if isinstance(data, EventStore) else EventStore.from_records(data, delay_dtype=np.float64)
         
-        # Convert timestamps to datetime objects
-        for item in data:
-            try:
-                item['timestamp'] = datetime.fromisoformat(item['timestamp'].replace('Z', '+00:00'))
-            except ValueError as e:
-                raise ValueError(f"Invalid timestamp format: {item['timestamp']}. Expected ISO format (YYYY-MM-DDTHH:mm:ss)")
+        # Anomaly descriptions quote delays as they were sent (30, not 30.0), in timestamp order
+        order = np.argsort(events.timestamps, kind='stable')
+        if isinstance(data, EventStore):
+            sent_delays = [events.delay_at(i) for i in order]
+        else:
+            sent = [float(item['delay']) if isinstance(item['delay'], str) else item['delay'] for item in data]
+            sent_delays = [sent[i] for i in order]
         
         # Sort by timestamp
-        data.sort(key=lambda x: x['timestamp'])
+        events = events.sorted()
+        step_delays = events.delays.astype(np.float64)
         
         # Calculate delays between steps
-        delays = []
-        for i in range(1, len(data)):
-            delay = (data[i]['timestamp'] - data[i-1]['timestamp']).total_seconds() / 3600  # Convert to hours
-            delays.append(delay)
-        
-        # Calculate bottleneck impact scores
-        bottlenecks = []
-        for i, step in enumerate(data):
-            if i == 0:
-                continue
-            impact = float(step['delay']) / max(delays) if max(delays) > 0 else 0
-            bottlenecks.append({
-                'step': step['step'],
-                'impact': impact,
-                'delay': float(step['delay'])
-            })
+        delays = np.diff(events.timestamps) / NS_PER_HOUR  # Convert to hours
+        max_delay = delays.max() if len(delays) else 0
         
-        # Sort bottlenecks by impact
-        bottlenecks.sort(key=lambda x: x['impact'], reverse=True)
+        # Calculate bottleneck impact scores, sorted by impact
+        impacts = step_delays[1:] / max_delay if max_delay > 0 else np.zeros(len(delays))
+        bottlenecks = [{
+            'step': events.step_at(i + 1),
+            'impact': float(impacts[i]),
+            'delay': events.delay_at(i + 1)
+        } for i in np.argsort(-impacts, kind='stable')]
         
         # Detect anomalies using Isolation Forest
-        delay_values = np.array([float(item['delay']) for item in data]).reshape(-1, 1)
+        delay_values = step_delays.reshape(-1, 1)
         scaler = StandardScaler()
         delay_values_scaled = scaler.fit_transform(delay_values)
         
         iso_forest = IsolationForest(contamination=0.1, random_state=42)
         anomalies = iso_forest.fit_predict(delay_values_scaled)
         
-        # Identify anomalous steps
-        anomalous_steps = []
-        for i, (is_anomaly, step) in enumerate(zip(anomalies, data)):
-            if is_anomaly == -1:  # -1 indicates anomaly
-                anomalous_steps.append({
-                    'step': step['step'],
-                    'description': f"Unusual delay pattern detected: {step['delay']} hours"
-                })
+        # Identify anomalous steps (-1 indicates anomaly)
+        anomalous_steps = [{
+            'step': events.step_at(i),
+            'description': f"Unusual delay pattern detected: {sent_delays[i]} hours"
+        } for i in np.flatnonzero(anomalies == -1)]
         
         # Generate recommendations
         recommendations = []
@@ -409,15 +365,34 @@ def analyze_timeseries_endpoint():
         if not data or 'data' not in data:
             return jsonify({'error': 'No data provided'}), 400
         
-        results = analyze_timeseries(data['data'])
+        if data.get('mode') == 'windowed':
+            results = cpu_executor.run(
+                analyze_timeseries_windows,
+                data['data'],
+                window=data.get('window', DEFAULT_WINDOW),
+                step=data.get('step'),
+                max_points=data.get('maxPoints', DEFAULT_MAX_POINTS),
+                max_steps=data.get('maxSteps', DEFAULT_MAX_STEPS),
+                anomaly_threshold=data.get('anomalyThreshold', DEFAULT_ANOMALY_THRESHOLD)
+            )
+        else:
+            results = cpu_executor.run(analyze_timeseries, data['data'])
         return jsonify(results)
     
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
         return jsonify({'error': str(e)}), 500
         
-# Initialize the model when the server starts
-initialize_model()
+# Initialize the model when the server starts. When this file is run directly, spawned
+# preprocessing workers re-import it as __mp_main__; skip the model download there. They
+# still import torch and build the app, so PARALLEL_BACKEND=process belongs under uvicorn.
+if __name__ != '__mp_main__':
+    initialize_model()
 
 if __name__ == '__main__':
+    if PARALLEL_BACKEND == 'process':
+        logger.warning("PARALLEL_BACKEND=process under 'python app.py' makes every worker process import "
+                       "torch and this app; run 'uvicorn asgi:app' instead")
     app.run(debug=True, port=5000, host='0.0.0.0')  # Allow external connections 
\ No newline at end of file
@@ -8,6 +8,9 @@ from werkzeug.utils import secure_filename
 import logging
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from serving import BoundedExecutor, Overloaded, overloaded_response, cors_origins, env_int, env_float
+from event_store import EventStore, NS_PER_HOUR
+from timeseries import analyze_timeseries_windows, DEFAULT_WINDOW, DEFAULT_MAX_POINTS, DEFAULT_MAX_STEPS, DEFAULT_ANOMALY_THRESHOLD
 # Removed sklearn imports to avoid dependency issues
 
 # Load environment variables
@@ -15,10 +18,8 @@ load_dotenv()
 
 app = Flask(__name__)
 # Configure CORS to allow requests from any localhost port
-CORS(app, resources={r"/api/*": {"origins": [
-    "http://localhost:3000",
-    os.getenv('FRONTEND_URL', 'http://localhost:3000')
-]}})
+# Retry-After is exposed so the frontend can read it on 429/503 responses
+CORS(app, resources={r"/api/*": {"origins": cors_origins()}}, expose_headers=['Retry-After'])
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,6 +35,15 @@ app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024
 # Allowed file extensions
 ALLOWED_EXTENSIONS = set(os.getenv('ALLOWED_EXTENSIONS', 'csv,json,xls,xlsx').split(','))
 
+# Bounded executor so CPU-heavy parsing is rejected instead of queueing without limit
+cpu_executor = BoundedExecutor(
+    'cpu',
+    max_workers=env_int('CPU_WORKERS', 2),
+    max_queue=env_int('CPU_QUEUE', 4),
+    timeout=env_float('CPU_TIMEOUT', 60),
+    retry_after=env_int('RETRY_AFTER_SECONDS', 1),
+)
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -125,9 +135,9 @@ def upload_file():
             # Try to read the file and return basic info
             try:
                 if filename.endswith('.csv'):
-                    df = pd.read_csv(filepath)
+                    df = cpu_executor.run(pd.read_csv, filepath)
                 elif filename.endswith(('.xls', '.xlsx')):
-                    df = pd.read_excel(filepath)
+                    df = cpu_executor.run(pd.read_excel, filepath)
                 else:
                     return jsonify({'error': 'Unsupported file format'}), 400
                 
@@ -139,6 +149,8 @@ def upload_file():
                     'file_size': os.path.getsize(filepath)
                 })
             
+            except Overloaded as e:
+                return overloaded_response(e)
             except Exception as e:
                 logger.error(f"Error reading uploaded file: {str(e)}")
                 return jsonify({'error': 'Error reading file'}), 400
@@ -150,75 +162,49 @@ def upload_file():
         return jsonify({'error': 'Internal server error'}), 500
 
 def analyze_timeseries(data):
-    """Analyze time series data for bottlenecks and anomalies"""
+    """Analyze time series data for bottlenecks and anomalies.
+
+    ``data`` is a list of event dicts or an ``EventStore``.
+    """
     try:
-        # Validate input data
-        if not isinstance(data, list):
-            raise ValueError("Input data must be a list of objects")
-        
-        # Validate each item in the data
-        for item in data:
-            if not isinstance(item, dict):
-                raise ValueError("Each item must be a dictionary")
-            if 'timestamp' not in item:
-                raise ValueError("Each item must have a 'timestamp' field")
-            if 'step' not in item:
-                raise ValueError("Each item must have a 'step' field")
-            if 'delay' not in item:
-                raise ValueError("Each item must have a 'delay' field")
-            
-            # Convert delay to float if it's a string
-            if isinstance(item['delay'], str):
-                try:
-                    item['delay'] = float(item['delay'])
-                except ValueError:
-                    raise ValueError(f"Delay value '{item['delay']}' cannot be converted to a number")
+        # Load events into the column store; the caller's list is left untouched and its
+        # delays are kept in float64 so results match the values that were sent
+        events = data if isinstance(data, EventStore) else EventStore.from_records(data, delay_dtype=np.float64)
         
-        # Convert timestamps to datetime objects
-        for item in data:
-            try:
-                item['timestamp'] = datetime.fromisoformat(item['timestamp'].replace('Z', '+00:00'))
-            except ValueError as e:
-                raise ValueError(f"Invalid timestamp format: {item['timestamp']}. Expected ISO format (YYYY-MM-DDTHH:mm:ss)")
+        # Anomaly descriptions quote delays as they were sent (30, not 30.0), in timestamp order
+        order = np.argsort(events.timestamps, kind='stable')
+        if isinstance(data, EventStore):
+            sent_delays = [events.delay_at(i) for i in order]
+        else:
+            sent = [float(item['delay']) if isinstance(item['delay'], str) else item['delay'] for item in data]
+            sent_delays = [sent[i] for i in order]
         
         # Sort by timestamp
-        data.sort(key=lambda x: x['timestamp'])
+        events = events.sorted()
+        step_delays = events.delays.astype(np.float64)
         
         # Calculate delays between steps
-        delays = []
-        for i in range(1, len(data)):
-            delay = (data[i]['timestamp'] - data[i-1]['timestamp']).total_seconds() / 3600  # Convert to hours
-            delays.append(delay)
-        
-        # Calculate bottleneck impact scores
-        bottlenecks = []
-        for i, step in enumerate(data):
-            if i == 0:
-                continue
-            impact = float(step['delay']) / max(delays) if max(delays) > 0 else 0
-            bottlenecks.append({
-                'step': step['step'],
-                'impact': impact,
-                'delay': float(step['delay'])
-            })
+        delays = np.diff(events.timestamps) / NS_PER_HOUR  # Convert to hours
+        max_delay = delays.max() if len(delays) else 0
         
-        # Sort bottlenecks by impact
-        bottlenecks.sort(key=lambda x: x['impact'], reverse=True)
+        # Calculate bottleneck impact scores, sorted by impact
+        impacts = step_delays[1:] / max_delay if max_delay > 0 else np.zeros(len(delays))
+        bottlenecks = [{
+            'step': events.step_at(i + 1),
+            'impact': float(impacts[i]),
+            'delay': events.delay_at(i + 1)
+        } for i in np.argsort(-impacts, kind='stable')]
         
         # Detect anomalies using simple statistical methods (Z-score)
-        delay_values = np.array([float(item['delay']) for item in data])
-        mean_delay = np.mean(delay_values)
-        std_delay = np.std(delay_values)
+        mean_delay = np.mean(step_delays)
+        std_delay = np.std(step_delays)
+        z_scores = np.abs(step_delays - mean_delay) / std_delay if std_delay > 0 else np.zeros(len(step_delays))
         
         # Identify anomalous steps using Z-score (threshold = 2)
-        anomalous_steps = []
-        for i, step in enumerate(data):
-            z_score = abs((float(step['delay']) - mean_delay) / std_delay) if std_delay > 0 else 0
-            if z_score > 2:  # Anomaly threshold
-                anomalous_steps.append({
-                    'step': step['step'],
-                    'description': f"Unusual delay pattern detected: {step['delay']} hours (Z-score: {z_score:.2f})"
-                })
+        anomalous_steps = [{
+            'step': events.step_at(i),
+            'description': f"Unusual delay pattern detected: {sent_delays[i]} hours (Z-score: {z_scores[i]:.2f})"
+        } for i in np.flatnonzero(z_scores > 2)]
         
         # Generate recommendations
         recommendations = []
@@ -262,9 +248,22 @@ def analyze_timeseries_endpoint():
         if not data or 'data' not in data:
             return jsonify({'error': 'No data provided'}), 400
         
-        results = analyze_timeseries(data['data'])
+        if data.get('mode') == 'windowed':
+            results = cpu_executor.run(
+                analyze_timeseries_windows,
+                data['data'],
+                window=data.get('window', DEFAULT_WINDOW),
+                step=data.get('step'),
+                max_points=data.get('maxPoints', DEFAULT_MAX_POINTS),
+                max_steps=data.get('maxSteps', DEFAULT_MAX_STEPS),
+                anomaly_threshold=data.get('anomalyThreshold', DEFAULT_ANOMALY_THRESHOLD)
+            )
+        else:
+            results = cpu_executor.run(analyze_timeseries, data['data'])
         return jsonify(results)
     
+    except Overloaded as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
         return jsonify({'error': str(e)}), 500
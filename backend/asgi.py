@@ -0,0 +1,44 @@
+"""ASGI entry point for the Flask apps.
+
+Run with ``uvicorn asgi:app --host 0.0.0.0 --port 5000``. Set ``ASGI_FLASK_APP=app_simple``
+to serve the simplified backend instead of the BERT one.
+"""
+import importlib
+import logging
+import os
+
+from a2wsgi import WSGIMiddleware
+from dotenv import load_dotenv
+
+from serving import ConcurrencyLimitMiddleware, cors_origins, env_int
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+flask_app = importlib.import_module(os.getenv('ASGI_FLASK_APP', 'app')).app
+
+# Maximum number of requests handled at the same time per endpoint; extra requests get 429
+ENDPOINT_LIMITS = {
+    '/api/analyze': env_int('ANALYZE_CONCURRENCY', 8),
+    '/api/analyze-timeseries': env_int('TIMESERIES_CONCURRENCY', 8),
+    '/api/ingest-data': env_int('INGEST_CONCURRENCY', 4),
+    '/api/upload': env_int('INGEST_CONCURRENCY', 4),
+    '/api/ingest-batch': env_int('BATCH_CONCURRENCY', 1),
+}
+
+# Every request admitted by the limiter needs a thread of its own, plus headroom for
+# unlimited endpoints such as /api/health; a smaller pool would queue admitted requests
+# instead of shedding them
+REQUIRED_THREADS = sum(ENDPOINT_LIMITS.values()) + env_int('ASGI_THREAD_HEADROOM', 4)
+ASGI_THREADS = env_int('ASGI_THREADS', REQUIRED_THREADS)
+if ASGI_THREADS < REQUIRED_THREADS:
+    logger.warning(f"ASGI_THREADS={ASGI_THREADS} is below the {REQUIRED_THREADS} threads the endpoint "
+                   f"limits need; admitted requests may queue instead of being shed")
+
+app = ConcurrencyLimitMiddleware(
+    WSGIMiddleware(flask_app, workers=ASGI_THREADS),
+    limits=ENDPOINT_LIMITS,
+    retry_after=env_int('RETRY_AFTER_SECONDS', 1),
+    allowed_origins=cors_origins(),
+)
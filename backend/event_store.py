@@ -0,0 +1,257 @@
+"""Compact column store for process step events.
+
+Each event takes 16 bytes: an int64 epoch timestamp in nanoseconds (UTC), a float32
+delay and an int32 id into a dictionary of step names. A million events therefore
+need about 16 MB (15.3 MiB), against roughly 360 bytes per event (~360 MB per million)
+for the list of dicts with ``datetime`` timestamps the analyses used to build. Between
+``compact`` calls, appends may leave up to 2x spare capacity.
+
+float32 keeps about 7 significant digits of a delay (979411.582 is stored as 979411.56).
+Stores built for a single request can pass ``delay_dtype=np.float64`` to keep the exact
+values at 20 bytes per event.
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+NS_PER_HOUR = 3600 * 10**9
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_epoch_ns(timestamps):
+    """Convert ISO strings, datetimes or Timestamps to int64 UTC epoch nanoseconds"""
+    parsed = pd.to_datetime(pd.Series(timestamps, dtype=object), utc=True, format='ISO8601')
+    return parsed.dt.tz_convert(None).astype('datetime64[ns]').to_numpy().view('int64')
+
+
+def _scalar_epoch_ns(timestamp):
+    """Convert one timestamp to UTC epoch nanoseconds without going through a Series"""
+    if isinstance(timestamp, pd.Timestamp):
+        return timestamp.value
+    if isinstance(timestamp, str):
+        try:
+            timestamp = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        except ValueError:
+            # ISO variants fromisoformat does not accept, e.g. '20240101T10:00:00'
+            return int(_to_epoch_ns([timestamp])[0])
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        delta = timestamp - _EPOCH
+        return (delta.days * 86400 + delta.seconds) * 10**9 + delta.microseconds * 1000
+    return int(_to_epoch_ns([timestamp])[0])
+
+
+class EventStore:
+    """Append-only, array backed container of (timestamp, step, delay) events"""
+
+    def __init__(self, capacity=1024, delay_dtype=np.float32):
+        self._timestamps = np.empty(capacity, dtype=np.int64)
+        self._delays = np.empty(capacity, dtype=delay_dtype)
+        self._step_ids = np.empty(capacity, dtype=np.int32)
+        self._size = 0
+        self._sorted = True
+        self.steps = []
+        self._step_index = {}
+
+    @classmethod
+    def _from_arrays(cls, timestamps, delays, step_ids, steps, is_sorted):
+        store = cls(capacity=0)
+        store._timestamps = timestamps
+        store._delays = delays
+        store._step_ids = step_ids
+        store._size = len(timestamps)
+        store._sorted = is_sorted
+        store.steps = list(steps)
+        store._step_index = {name: i for i, name in enumerate(store.steps)}
+        return store
+
+    @classmethod
+    def from_records(cls, data, delay_dtype=np.float32):
+        """Build a store from a list of ``{'timestamp', 'step', 'delay'}`` dicts.
+
+        Timestamps are ISO strings (naive ones are taken as UTC) and delays numbers or
+        numeric strings. The input list is not modified.
+        """
+        if not isinstance(data, list):
+            raise ValueError("Input data must be a list of objects")
+        if not all(isinstance(item, dict) for item in data):
+            raise ValueError("Each item must be a dictionary")
+
+        store = cls(capacity=len(data), delay_dtype=delay_dtype)
+        if not data:
+            return store
+
+        df = pd.DataFrame(data)
+        for field in ('timestamp', 'step', 'delay'):
+            if field not in df.columns or df[field].isna().any():
+                raise ValueError(f"Each item must have a '{field}' field")
+
+        delays = pd.to_numeric(df['delay'], errors='coerce')
+        invalid = delays.isna()
+        if invalid.any():
+            raise ValueError(f"Delay value '{df['delay'][invalid].iloc[0]}' cannot be converted to a number")
+
+        try:
+            timestamps = _to_epoch_ns(df['timestamp'])
+        except (ValueError, TypeError):
+            raise ValueError("Invalid timestamp format. Expected ISO format (YYYY-MM-DDTHH:mm:ss)")
+
+        store._extend_arrays(timestamps, df['step'].astype(str), delays.to_numpy())
+        return store
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def timestamps(self):
+        """int64 UTC epoch nanoseconds, one per event"""
+        return self._timestamps[:self._size]
+
+    @property
+    def delays(self):
+        """Delays in hours (float32 unless created with another ``delay_dtype``), one per event"""
+        return self._delays[:self._size]
+
+    @property
+    def step_ids(self):
+        """int32 index into ``steps``, one per event"""
+        return self._step_ids[:self._size]
+
+    @property
+    def is_sorted(self):
+        return self._sorted
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column arrays, spare capacity included"""
+        return self._timestamps.nbytes + self._delays.nbytes + self._step_ids.nbytes
+
+    def step_id(self, step):
+        """Dictionary id of a step name, adding it when it is new"""
+        step_id = self._step_index.get(step)
+        if step_id is None:
+            step_id = len(self.steps)
+            self.steps.append(step)
+            self._step_index[step] = step_id
+        return step_id
+
+    def step_at(self, index):
+        return self.steps[self._step_ids[:self._size][index]]
+
+    def delay_at(self, index):
+        """Delay of one event as a Python float.
+
+        float32 values come back as their shortest decimal form (1.2, not
+        1.2000000476837158); that only hides the noise, the value itself still has
+        about 7 significant digits.
+        """
+        delay = self._delays[:self._size][index]
+        if self._delays.dtype == np.float32:
+            return float(str(delay))
+        return float(delay)
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        capacity = len(self._timestamps)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 16)
+        for name in ('_timestamps', '_delays', '_step_ids'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+
+    def _extend_arrays(self, timestamps, steps, delays):
+        count = len(timestamps)
+        if count == 0:
+            return
+        codes, names = pd.factorize(pd.Series(steps, dtype=object))
+        ids = np.array([self.step_id(str(name)) for name in names], dtype=np.int32)[codes]
+
+        self._reserve(count)
+        start, end = self._size, self._size + count
+        if self._sorted:
+            previous = self._timestamps[start - 1] if start else timestamps[0]
+            self._sorted = bool(previous <= timestamps[0]) and bool(np.all(np.diff(timestamps) >= 0))
+        self._timestamps[start:end] = timestamps
+        self._delays[start:end] = delays
+        self._step_ids[start:end] = ids
+        self._size = end
+
+    def append(self, timestamp, step, delay):
+        """Add one event, e.g. from a streamed process log.
+
+        The timestamp is parsed directly rather than through pandas, so single appends
+        stay cheap.
+        """
+        timestamp_ns = _scalar_epoch_ns(timestamp)
+        delay = float(delay)
+        step_id = self.step_id(str(step))
+
+        self._reserve(1)
+        index = self._size
+        if self._sorted and index and self._timestamps[index - 1] > timestamp_ns:
+            self._sorted = False
+        self._timestamps[index] = timestamp_ns
+        self._delays[index] = delay
+        self._step_ids[index] = step_id
+        self._size = index + 1
+
+    def extend(self, timestamps, steps, delays):
+        """Add many events at once from parallel sequences"""
+        self._extend_arrays(_to_epoch_ns(list(timestamps)), [str(step) for step in steps],
+                            np.asarray(delays, dtype=np.float64))
+
+    def compact(self):
+        """Release spare capacity left by appends"""
+        for name in ('_timestamps', '_delays', '_step_ids'):
+            setattr(self, name, getattr(self, name)[:self._size].copy())
+
+    def _take(self, selector, is_sorted):
+        return EventStore._from_arrays(self.timestamps[selector], self.delays[selector],
+                                       self.step_ids[selector], self.steps, is_sorted)
+
+    def sorted(self):
+        """The events ordered by timestamp (stable); returns self when already sorted"""
+        if self._sorted:
+            return self
+        return self._take(np.argsort(self.timestamps, kind='stable'), True)
+
+    def slice_time(self, start=None, end=None):
+        """Events with ``start <= timestamp < end``; either bound may be omitted.
+
+        Bounds are anything ``pd.Timestamp`` accepts. On a sorted store this is a binary
+        search returning views that share memory with this store.
+        """
+        start_ns = _scalar_epoch_ns(start) if start is not None else None
+        end_ns = _scalar_epoch_ns(end) if end is not None else None
+        timestamps = self.timestamps
+        if self._sorted:
+            lo = np.searchsorted(timestamps, start_ns, side='left') if start_ns is not None else 0
+            hi = np.searchsorted(timestamps, end_ns, side='left') if end_ns is not None else self._size
+            return self._take(slice(lo, hi), True)
+
+        mask = np.ones(self._size, dtype=bool)
+        if start_ns is not None:
+            mask &= timestamps >= start_ns
+        if end_ns is not None:
+            mask &= timestamps < end_ns
+        return self._take(mask, False)
+
+    def for_step(self, step):
+        """Events of a single step"""
+        step_id = self._step_index.get(step)
+        if step_id is None:
+            return self._take(slice(0, 0), True)
+        return self._take(self.step_ids == step_id, self._sorted)
+
+    def to_frame(self):
+        """Columns as a DataFrame with UTC timestamps, categorical steps and float64 delays"""
+        return pd.DataFrame({
+            'timestamp': pd.to_datetime(self.timestamps, unit='ns', utc=True),
+            'step': pd.Categorical.from_codes(self.step_ids, categories=self.steps),
+            'delay': self.delays.astype(np.float64),
+        })
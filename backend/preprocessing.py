@@ -0,0 +1,267 @@
+"""Data reading and preprocessing for the ingestion endpoints.
+
+Kept free of Flask and model imports so unpickling work in a process pool worker does
+not pull them in.
+"""
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+import json
+import logging
+import math
+import multiprocessing
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PARALLEL_BACKENDS = ('thread', 'process')
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool():
+    """Process pool shared by all calls, started on first use and kept for the life of the server.
+
+    Workers are spawned rather than forked: forking a multithreaded server with torch
+    loaded can deadlock the child. Spawning is slow, which is why the pool is reused.
+    It has one worker per CPU; each call caps its own share with ``workers``.
+
+    A spawned worker also re-imports the script that started the server as
+    ``__mp_main__``. Under uvicorn that is the uvicorn launcher, but with
+    ``python app.py`` every worker imports torch and transformers and builds its own
+    Flask app, so the process backend should be run under uvicorn.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1,
+                                                mp_context=multiprocessing.get_context('spawn'))
+        return _process_pool
+
+
+def _reset_process_pool(pool):
+    """Drop a broken pool so the next call starts a fresh one"""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is pool:
+            _process_pool = None
+
+
+def _apply_chunk(fn, chunk):
+    return [fn(item) for item in chunk]
+
+
+def map_parallel(fn, items, workers=1, backend='thread'):
+    """Apply fn to every item and return the results in order.
+
+    Runs serially when ``workers`` is 1 or there is only one item, otherwise on a
+    thread pool or the shared process pool with at most ``workers`` workers.
+    """
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    if backend not in PARALLEL_BACKENDS:
+        raise ValueError(f"Unknown parallel backend '{backend}'. Expected one of {', '.join(PARALLEL_BACKENDS)}")
+
+    workers = min(workers, len(items))
+    if backend == 'process':
+        # One contiguous chunk per worker: bounds this call's share of the pool and
+        # keeps pickling overhead from dominating on wide frames
+        size = math.ceil(len(items) / workers)
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        pool = _get_process_pool()
+        try:
+            return [result for chunk in pool.map(partial(_apply_chunk, fn), chunks) for result in chunk]
+        except BrokenProcessPool:
+            _reset_process_pool(pool)
+            raise
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
+
+
+def load_json_file(filepath):
+    with open(filepath, 'r') as f:
+        return json.load(f)
+
+
+def read_dataframe(filepath, data_type):
+    """Read an uploaded file into a DataFrame"""
+    if data_type == 'csv':
+        return pd.read_csv(filepath)
+    elif data_type == 'json':
+        # Read JSON file with proper handling
+        json_data = load_json_file(filepath)
+
+        # Convert JSON data to DataFrame
+        if isinstance(json_data, list):
+            # If JSON is a list of objects
+            df = pd.DataFrame(json_data)
+        elif isinstance(json_data, dict):
+            # If JSON is a single object
+            df = pd.DataFrame([json_data])
+        else:
+            raise ValueError('Invalid JSON format. Expected a list of objects or a single object.')
+
+        # Ensure all required columns are present
+        if df.empty:
+            raise ValueError('No data found in JSON file.')
+
+        # Log the DataFrame structure
+        logger.info(f"DataFrame columns: {df.columns.tolist()}")
+        logger.info(f"DataFrame shape: {df.shape}")
+        return df
+    elif data_type in ['xls', 'xlsx']:
+        return pd.read_excel(filepath)
+    else:
+        raise ValueError('Unsupported file type')
+
+
+def save_dataframe(df, filepath, data_type):
+    """Write a processed DataFrame back in the format it was uploaded in"""
+    if data_type == 'csv':
+        df.to_csv(filepath, index=False)
+    elif data_type == 'json':
+        df.to_json(filepath, orient='records')
+    elif data_type in ['xls', 'xlsx']:
+        df.to_excel(filepath, index=False)
+
+
+def summarize_dataframe(df, df_processed, filepath):
+    """Summary statistics returned to the client after ingestion"""
+    return {
+        'original_rows': len(df),
+        'processed_rows': len(df_processed),
+        'columns': list(df_processed.columns),
+        'numeric_columns': list(df_processed.select_dtypes(include=[np.number]).columns),
+        'categorical_columns': list(df_processed.select_dtypes(include=['object']).columns),
+        'missing_values': df_processed.isnull().sum().to_dict(),
+        'file_path': filepath
+    }
+
+
+def _fill_value(series, strategy):
+    if strategy == 'mean':
+        return series.mean()
+    elif strategy == 'median':
+        return series.median()
+    # Same as DataFrame.mode().iloc[0] on a non-empty frame: first mode, NaN when the column has no values
+    modes = series.mode()
+    return modes.iloc[0] if len(modes) else np.nan
+
+
+def _minmax_scale(series):
+    return (series - series.min()) / (series.max() - series.min())
+
+
+def _standard_scale(series):
+    return (series - series.mean()) / series.std()
+
+
+def _label_encode(series):
+    return series.astype('category').cat.codes
+
+
+def process_data(df, preprocessing_steps, workers=1, backend='thread'):
+    """Process the data according to specified preprocessing steps.
+
+    With ``workers`` > 1 the per-column statistics and transforms (missing value fill
+    values, normalization and label encoding) run on a thread or process pool. Outlier
+    removal filters rows column by column, so it always runs serially. Results and
+    errors are identical to the serial path.
+    """
+    try:
+        # Make a copy of the DataFrame to avoid modifying the original
+        df_processed = df.copy()
+
+        # Handle missing values
+        if preprocessing_steps.get('handle_missing'):
+            strategy = preprocessing_steps['handle_missing'].get('strategy', 'mean')
+            if strategy in ('mean', 'median', 'mode'):
+                # Serial and parallel runs share this path, so they fill and fail the same way
+                if strategy == 'mode' and df_processed.empty:
+                    raise ValueError("Cannot fill by mode: the data has no rows")
+                columns = df_processed.columns
+                fill_values = map_parallel(partial(_fill_value, strategy=strategy),
+                                           [df_processed[col] for col in columns], workers, backend)
+                df_processed = df_processed.fillna(pd.Series(fill_values, index=columns))
+            elif strategy == 'drop':
+                df_processed = df_processed.dropna()
+
+        # Handle outliers
+        if preprocessing_steps.get('handle_outliers'):
+            method = preprocessing_steps['handle_outliers'].get('method', 'zscore')
+            threshold = preprocessing_steps['handle_outliers'].get('threshold', 3)
+
+            numeric_columns = df_processed.select_dtypes(include=[np.number]).columns
+
+            if method == 'zscore':
+                for col in numeric_columns:
+                    z_scores = np.abs((df_processed[col] - df_processed[col].mean()) / df_processed[col].std())
+                    df_processed = df_processed[z_scores < threshold]
+            elif method == 'iqr':
+                for col in numeric_columns:
+                    Q1 = df_processed[col].quantile(0.25)
+                    Q3 = df_processed[col].quantile(0.75)
+                    IQR = Q3 - Q1
+                    df_processed = df_processed[
+                        (df_processed[col] >= Q1 - 1.5 * IQR) &
+                        (df_processed[col] <= Q3 + 1.5 * IQR)
+                    ]
+
+        # Normalize/Scale data
+        if preprocessing_steps.get('normalize'):
+            method = preprocessing_steps['normalize'].get('method', 'minmax')
+            numeric_columns = df_processed.select_dtypes(include=[np.number]).columns
+            scale = {'minmax': _minmax_scale, 'standard': _standard_scale}.get(method)
+
+            if scale is not None:
+                scaled = map_parallel(scale, [df_processed[col] for col in numeric_columns], workers, backend)
+                for col, values in zip(numeric_columns, scaled):
+                    df_processed[col] = values
+
+        # Encode categorical variables
+        if preprocessing_steps.get('encode_categorical'):
+            method = preprocessing_steps['encode_categorical'].get('method', 'onehot')
+            categorical_columns = df_processed.select_dtypes(include=['object']).columns
+
+            if method == 'onehot':
+                df_processed = pd.get_dummies(df_processed, columns=categorical_columns)
+            elif method == 'label':
+                encoded = map_parallel(_label_encode, [df_processed[col] for col in categorical_columns], workers, backend)
+                for col, codes in zip(categorical_columns, encoded):
+                    df_processed[col] = codes
+
+        # Convert to dictionary format for JSON serialization
+        result = df_processed.to_dict(orient='records')
+        return result
+
+    except Exception as e:
+        logger.error(f"Error in process_data: {str(e)}")
+        raise Exception(f"Error processing data: {str(e)}")
+
+
+def ingest_file(filepath, data_type, preprocessing_steps, processed_filepath, workers=1, backend='thread'):
+    """Read, preprocess and save one uploaded file, returning its summary"""
+    df = read_dataframe(filepath, data_type)
+    df_processed = pd.DataFrame(process_data(df, preprocessing_steps, workers, backend))
+    save_dataframe(df_processed, processed_filepath, data_type)
+    return summarize_dataframe(df, df_processed, processed_filepath)
+
+
+def _ingest_job(job):
+    """Run one batch ingestion job, reporting failures instead of raising"""
+    try:
+        return {'filename': job['filename'], 'summary': ingest_file(**job['args'])}
+    except Exception as e:
+        logger.error(f"Error ingesting {job['filename']}: {str(e)}")
+        return {'filename': job['filename'], 'error': str(e)}
+
+
+def ingest_batch(jobs, workers=1, backend='thread'):
+    """Ingest several files at once, at most ``workers`` at a time"""
+    return map_parallel(_ingest_job, jobs, workers, backend)
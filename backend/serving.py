@@ -0,0 +1,142 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from collections import defaultdict
+import json
+import logging
+import os
+import threading
+
+from flask import jsonify
+
+logger = logging.getLogger(__name__)
+
+
+def env_int(name, default):
+    """Read an integer setting from the environment"""
+    return int(os.getenv(name, default))
+
+
+def env_float(name, default):
+    """Read a float setting from the environment"""
+    return float(os.getenv(name, default))
+
+
+def cors_origins():
+    """Origins allowed to call the API from a browser"""
+    return [
+        "http://localhost:3000",
+        os.getenv('FRONTEND_URL', 'http://localhost:3000')
+    ]
+
+
+class Overloaded(Exception):
+    """Raised when work is rejected because the server is saturated"""
+
+    def __init__(self, message, retry_after=1, status=503):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+
+def overloaded_response(error):
+    """Build the Flask response for a rejected request"""
+    response = jsonify({'error': str(error)})
+    response.status_code = error.status
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+class BoundedExecutor:
+    """Thread pool with a fixed number of slots that rejects work instead of queueing it forever.
+
+    At most ``max_workers`` tasks run at once and at most ``max_queue`` more may wait.
+    Anything beyond that raises ``Overloaded`` immediately, and a task that does not
+    finish within ``timeout`` seconds raises ``Overloaded`` for its caller while it keeps
+    holding its slot until it is actually done.
+    """
+
+    def __init__(self, name, max_workers, max_queue=0, timeout=None, retry_after=1):
+        self.name = name
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    def run(self, fn, *args, **kwargs):
+        """Run ``fn`` in the pool and wait for its result"""
+        if not self._slots.acquire(blocking=False):
+            logger.warning(f"Executor '{self.name}' is saturated, rejecting work")
+            raise Overloaded(f"Server is busy ({self.name}), please retry later", retry_after=self.retry_after)
+
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            logger.warning(f"Executor '{self.name}' timed out after {self.timeout}s")
+            raise Overloaded(f"Server is busy ({self.name}), request timed out", retry_after=self.retry_after)
+
+
+class ConcurrencyLimitMiddleware:
+    """ASGI middleware that caps in-flight requests per endpoint.
+
+    Requests to a path listed in ``limits`` beyond its cap are answered straight
+    away with 429 and a Retry-After header, before they reach a worker thread.
+    The rejection never reaches Flask, so it carries its own CORS headers for
+    ``allowed_origins``; otherwise the browser could not read the status.
+    """
+
+    def __init__(self, app, limits, retry_after=1, allowed_origins=()):
+        self.app = app
+        self.limits = limits
+        self.retry_after = retry_after
+        self.allowed_origins = set(allowed_origins)
+        self.in_flight = defaultdict(int)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'OPTIONS':
+            await self.app(scope, receive, send)
+            return
+
+        path = scope['path']
+        limit = self.limits.get(path)
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        # Counters are only touched from the event loop, so no lock is needed
+        if self.in_flight[path] >= limit:
+            logger.warning(f"Concurrency limit {limit} reached for {path}, shedding request")
+            await self._reject(scope, send, path)
+            return
+
+        self.in_flight[path] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight[path] -= 1
+
+    async def _reject(self, scope, send, path):
+        body = json.dumps({'error': f'Too many concurrent requests to {path}, please retry later'}).encode()
+        headers = [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'retry-after', str(self.retry_after).encode()),
+        ]
+        origin = dict(scope['headers']).get(b'origin', b'').decode('latin-1')
+        if origin in self.allowed_origins:
+            headers += [
+                (b'access-control-allow-origin', origin.encode('latin-1')),
+                (b'access-control-expose-headers', b'Retry-After'),
+                (b'vary', b'Origin'),
+            ]
+        await send({
+            'type': 'http.response.start',
+            'status': 429,
+            'headers': headers,
+        })
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,122 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from event_store import EventStore  # noqa: E402
+
+
+def ns(timestamp):
+    return pd.Timestamp(timestamp, tz='UTC').value
+
+
+@pytest.fixture
+def records():
+    return [
+        {'timestamp': '2024-01-01T10:00:00', 'step': 'Collect', 'delay': 2.5},
+        {'timestamp': '2024-01-01T12:30:00Z', 'step': 'Process', 'delay': '1.25'},
+        {'timestamp': '2024-01-01T11:00:00', 'step': 'Collect', 'delay': 3},
+        {'timestamp': '2024-01-01T14:00:00+02:00', 'step': 'Report', 'delay': 0.5},
+    ]
+
+
+def test_from_records_encodes_columns(records):
+    snapshot = [dict(item) for item in records]
+    store = EventStore.from_records(records)
+
+    assert records == snapshot
+    assert len(store) == 4
+    assert store.timestamps.dtype == np.int64
+    assert store.delays.dtype == np.float32
+    assert store.step_ids.dtype == np.int32
+    assert store.steps == ['Collect', 'Process', 'Report']
+    assert store.step_ids.tolist() == [0, 1, 0, 2]
+    assert store.timestamps[3] == ns('2024-01-01T12:00:00')
+    assert store.delay_at(1) == 1.25
+    assert not store.is_sorted
+
+
+def test_from_records_validates():
+    with pytest.raises(ValueError, match="must have a 'step' field"):
+        EventStore.from_records([{'timestamp': '2024-01-01T10:00:00', 'delay': 1}])
+    with pytest.raises(ValueError, match="cannot be converted"):
+        EventStore.from_records([{'timestamp': '2024-01-01T10:00:00', 'step': 'a', 'delay': 'x'}])
+    with pytest.raises(ValueError, match="Invalid timestamp"):
+        EventStore.from_records([{'timestamp': 'yesterday', 'step': 'a', 'delay': 1}])
+
+
+def test_float64_delays_keep_exact_values():
+    data = [{'timestamp': '2024-01-01T10:00:00', 'step': 'a', 'delay': 979411.582}]
+    assert EventStore.from_records(data).delay_at(0) != 979411.582
+    assert EventStore.from_records(data, delay_dtype=np.float64).delay_at(0) == 979411.582
+
+
+def test_append_grows_and_tracks_order():
+    store = EventStore(capacity=2)
+    start = pd.Timestamp('2024-01-01', tz='UTC')
+    for i in range(100):
+        store.append((start + pd.Timedelta(minutes=i)).isoformat(), f'step{i % 3}', i / 2)
+
+    assert len(store) == 100
+    assert len(store.timestamps) == 100
+    assert store.nbytes >= 100 * 16
+    assert store.timestamps[99] == start.value + 99 * 60 * 10**9
+    assert store.delays[-1] == 49.5
+    assert store.steps == ['step0', 'step1', 'step2']
+    assert store.is_sorted
+
+    store.append('2023-12-31T00:00:00Z', 'step0', 1)
+    assert not store.is_sorted
+    assert store.sorted().is_sorted
+    assert store.sorted().timestamps[0] == ns('2023-12-31')
+
+    store.compact()
+    assert store.nbytes == 101 * 16
+
+
+def test_append_accepts_timestamp_types():
+    store = EventStore()
+    store.append('2024-01-01T10:00:00Z', 'a', 1)
+    store.append('2024-01-01T10:00:00', 'a', 1)
+    store.append(pd.Timestamp('2024-01-01T12:00:00+02:00'), 'a', 1)
+    store.append(pd.Timestamp('2024-01-01T10:00:00').to_pydatetime(), 'a', '1')
+    assert set(store.timestamps.tolist()) == {ns('2024-01-01T10:00:00')}
+
+
+def test_slice_time_on_sorted_store_returns_views():
+    store = EventStore()
+    store.extend(pd.date_range('2024-01-01', periods=10, freq='h', tz='UTC'), ['a'] * 10, range(10))
+    assert store.is_sorted
+
+    window = store.slice_time('2024-01-01T02:00:00Z', '2024-01-01T05:00:00Z')
+    assert window.timestamps.tolist() == [ns(f'2024-01-01T0{h}:00:00') for h in (2, 3, 4)]
+    assert np.shares_memory(window.timestamps, store.timestamps)
+    assert np.shares_memory(window.delays, store.delays)
+    assert len(store.slice_time(start='2024-01-01T08:00:00')) == 2
+    assert len(store.slice_time(end='2024-01-01T01:00:00')) == 1
+
+    # Appending to a slice must not overwrite the parent store
+    window.append('2024-01-01T05:30:00Z', 'b', 99)
+    assert store.delays[5] == 5
+
+
+def test_slice_time_on_unsorted_store_filters():
+    hours = [5, 1, 3, 9, 2]
+    store = EventStore()
+    store.extend([f'2024-01-01T0{h}:00:00' for h in hours], ['a'] * 5, hours)
+    assert not store.is_sorted
+
+    window = store.slice_time('2024-01-01T02:00:00', '2024-01-01T06:00:00')
+    assert window.delays.tolist() == [5, 3, 2]
+    assert not window.is_sorted
+
+
+def test_for_step(records):
+    store = EventStore.from_records(records)
+    collect = store.for_step('Collect')
+    assert collect.delays.tolist() == [2.5, 3.0]
+    assert {collect.step_at(i) for i in range(len(collect))} == {'Collect'}
+    assert len(store.for_step('Missing')) == 0
@@ -0,0 +1,92 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import map_parallel, process_data  # noqa: E402
+
+PARALLEL = [(3, 'thread'), (2, 'process')]
+
+
+def make_frame(rows=60, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.normal(size=(rows, 5)), columns=list('abcde'))
+    df[rng.random(size=df.shape) < 0.1] = np.nan
+    df['category'] = rng.choice(['x', 'y', 'z', None], size=rows)
+    df['label'] = rng.choice(['low', 'high'], size=rows)
+    return df
+
+
+FRAMES = {
+    'numeric': make_frame().drop(columns=['category', 'label']),
+    'mixed': make_frame(),
+    'all_nan_column': make_frame().assign(empty=np.nan),
+    'empty': make_frame().iloc[:0],
+}
+
+STEPS = {
+    'mean': {'handle_missing': {'strategy': 'mean'}},
+    'median': {'handle_missing': {'strategy': 'median'}},
+    'mode': {'handle_missing': {'strategy': 'mode'}},
+    'drop': {'handle_missing': {'strategy': 'drop'}},
+    'minmax': {'handle_missing': {'strategy': 'mode'}, 'normalize': {'method': 'minmax'}},
+    'standard': {'handle_missing': {'strategy': 'mode'}, 'normalize': {'method': 'standard'}},
+    'label': {'handle_missing': {'strategy': 'mode'}, 'encode_categorical': {'method': 'label'}},
+    'all': {
+        'handle_missing': {'strategy': 'mode'},
+        'handle_outliers': {'method': 'iqr'},
+        'normalize': {'method': 'standard'},
+        'encode_categorical': {'method': 'label'},
+    },
+}
+
+
+def run(df, steps, workers=1, backend='thread'):
+    """Records with NaN made comparable, or the error message"""
+    try:
+        records = process_data(df, steps, workers, backend)
+    except Exception as e:
+        return 'error', str(e)
+    return 'ok', [{key: None if pd.isna(value) else value for key, value in record.items()} for record in records]
+
+
+@pytest.mark.parametrize('workers, backend', PARALLEL)
+@pytest.mark.parametrize('steps', STEPS.values(), ids=STEPS.keys())
+@pytest.mark.parametrize('frame', FRAMES.values(), ids=FRAMES.keys())
+def test_parallel_matches_serial(frame, steps, workers, backend):
+    assert run(frame, steps, workers, backend) == run(frame, steps)
+
+
+def test_input_frame_is_not_modified():
+    df = make_frame()
+    snapshot = df.copy()
+    process_data(df, STEPS['all'], 3, 'thread')
+    pd.testing.assert_frame_equal(df, snapshot)
+
+
+def test_fill_values_use_column_statistics():
+    df = pd.DataFrame({'a': [1.0, np.nan, 3.0, 3.0], 'b': ['x', 'x', None, 'y']})
+    assert run(df[['a']], STEPS['mean'])[1][1] == {'a': pytest.approx(7 / 3)}
+    assert run(df[['a']], STEPS['median'])[1][1] == {'a': 3.0}
+    assert run(df, STEPS['mode'])[1][2] == {'a': 3.0, 'b': 'x'}
+
+
+@pytest.mark.parametrize('workers, backend', [(1, 'thread')] + PARALLEL)
+def test_errors_match_serial(workers, backend):
+    assert run(FRAMES['empty'], STEPS['mode'], workers, backend) == (
+        'error', 'Error processing data: Cannot fill by mode: the data has no rows')
+
+    status, message = run(FRAMES['mixed'], STEPS['median'], workers, backend)
+    assert status == 'error'
+    assert message == run(FRAMES['mixed'], STEPS['median'])[1]
+
+
+def test_map_parallel_keeps_order_and_rejects_unknown_backend():
+    items = list(range(25))
+    for workers, backend in PARALLEL:
+        assert map_parallel(abs, [-i for i in items], workers, backend) == items
+    with pytest.raises(ValueError, match="Unknown parallel backend 'gpu'"):
+        map_parallel(abs, items, 2, 'gpu')
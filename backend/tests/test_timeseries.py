@@ -0,0 +1,185 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from event_store import EventStore  # noqa: E402
+from timeseries import analyze_timeseries_windows, MAX_POINTS_LIMIT, MAX_STEPS_LIMIT  # noqa: E402
+
+
+def make_events(count, steps=('Collect', 'Process', 'Report'), hours=48, seed=0):
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2024-01-01T00:07:00')
+    offsets = rng.integers(0, hours * 3600, size=count)
+    return [
+        {
+            'timestamp': (start + pd.Timedelta(seconds=int(offset))).isoformat(),
+            'step': str(rng.choice(steps)),
+            'delay': round(float(rng.gamma(2.0, 1.5)), 3),
+        }
+        for offset in offsets
+    ]
+
+
+def brute_force(data, result):
+    """Recompute every window of ``result`` by filtering the raw events"""
+    df = pd.DataFrame(data)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+    window = pd.to_timedelta(result['window'])
+    step = pd.to_timedelta(result['step'])
+    first_bin = df['timestamp'].min().floor(step)
+
+    # Anomalies are judged against each step's delays over the whole input
+    grouped = df.groupby('step')['delay']
+    z = (df['delay'] - grouped.transform('mean')).abs() / grouped.transform(lambda d: d.std(ddof=0))
+    df['anomaly'] = z > 2
+
+    expected = {'event_counts': [], 'throughput': [], 'anomaly_counts': [], 'steps': {}}
+    for start in pd.to_datetime(result['windows']):
+        end = start + window
+        events = df[(df['timestamp'] >= start) & (df['timestamp'] < end)]
+        hours = (end - max(start, first_bin)) / pd.Timedelta(hours=1)
+        expected['event_counts'].append(len(events))
+        expected['throughput'].append(round(len(events) / hours, 4))
+        expected['anomaly_counts'].append(int(events['anomaly'].sum()))
+        for name in result['steps']:
+            delays = events.loc[events['step'] == name, 'delay']
+            series = expected['steps'].setdefault(name, {'count': [], 'mean_delay': [], 'max_delay': []})
+            series['count'].append(len(delays))
+            series['mean_delay'].append(round(delays.mean(), 4) if len(delays) else None)
+            series['max_delay'].append(round(delays.max(), 4) if len(delays) else None)
+    return expected
+
+
+def assert_matches(result, expected):
+    assert result['event_counts'] == expected['event_counts']
+    assert result['anomaly_counts'] == expected['anomaly_counts']
+    # Both sides round to 4 places from sums taken in a different order
+    assert result['throughput'] == pytest.approx(expected['throughput'], abs=1.5e-4)
+    assert set(result['steps']) == set(expected['steps'])
+    for name, series in result['steps'].items():
+        assert series['count'] == expected['steps'][name]['count']
+        for field in ('mean_delay', 'max_delay'):
+            actual = [np.nan if value is None else value for value in series[field]]
+            wanted = [np.nan if value is None else value for value in expected['steps'][name][field]]
+            assert actual == pytest.approx(wanted, abs=1.5e-4, nan_ok=True)
+
+
+def test_tumbling_windows():
+    data = make_events(500)
+    result = analyze_timeseries_windows(data, window='1h')
+
+    assert result['window'] == result['step'] == '1h'
+    assert not result['downsampled']
+    assert result['windows'][0] == '2024-01-01T00:00:00+00:00'
+    assert sum(result['event_counts']) == len(data)
+    assert_matches(result, brute_force(data, result))
+
+
+def test_sliding_windows():
+    data = make_events(500)
+    result = analyze_timeseries_windows(data, window='2h', step='30min')
+
+    assert (result['window'], result['step']) == ('2h', '30min')
+    # One window ends at each step bin, so windows overlap by three bins
+    assert pd.Timestamp(result['windows'][1]) - pd.Timestamp(result['windows'][0]) == pd.Timedelta('30min')
+    assert result['windows'][0] == '2023-12-31T22:30:00+00:00'
+    assert_matches(result, brute_force(data, result))
+
+
+def test_leading_partial_windows_use_covered_hours():
+    data = [
+        {'timestamp': '2024-01-01T00:10:00', 'step': 'a', 'delay': 1},
+        {'timestamp': '2024-01-01T00:20:00', 'step': 'a', 'delay': 3},
+        {'timestamp': '2024-01-01T01:10:00', 'step': 'b', 'delay': 2},
+    ]
+    result = analyze_timeseries_windows(data, window='2h', step='1h')
+
+    # The first window starts an hour before the data, so only its last hour is covered
+    assert result['windows'] == ['2023-12-31T23:00:00+00:00', '2024-01-01T00:00:00+00:00']
+    assert result['event_counts'] == [2, 3]
+    assert result['throughput'] == [2.0, 1.5]
+    assert result['steps']['a'] == {'count': [2, 2], 'mean_delay': [2.0, 2.0], 'max_delay': [3.0, 3.0]}
+    assert result['steps']['b'] == {'count': [0, 1], 'mean_delay': [None, 2.0], 'max_delay': [None, 2.0]}
+    assert_matches(result, brute_force(data, result))
+
+
+def test_downsampling_keeps_window_step_ratio():
+    data = make_events(800, hours=24 * 30)
+    result = analyze_timeseries_windows(data, window='30min', step='10min', max_points=50)
+
+    assert result['downsampled']
+    assert len(result['windows']) <= 50
+    window = pd.to_timedelta(result['window'])
+    step = pd.to_timedelta(result['step'])
+    assert step > pd.Timedelta(minutes=10)
+    assert window == 3 * step
+    assert_matches(result, brute_force(data, result))
+
+
+def test_extra_steps_are_folded_into_other():
+    steps = [f'step{i}' for i in range(30)]
+    data = make_events(600, steps=steps)
+    # Make two steps clearly the busiest
+    data += [dict(item, step='step7') for item in data[:150]] + [dict(item, step='step3') for item in data[150:250]]
+    result = analyze_timeseries_windows(data, window='6h', max_steps=2)
+
+    assert list(result['steps']) == ['step3', 'step7', 'other']
+    assert result['folded_steps'] == 28
+    counts = pd.DataFrame({name: series['count'] for name, series in result['steps'].items()})
+    assert counts.sum(axis=1).tolist() == result['event_counts']
+
+    # 'other' aggregates every folded step as if they were one
+    renamed = [dict(item, step=item['step'] if item['step'] in ('step3', 'step7') else 'other') for item in data]
+    expected = brute_force(renamed, result)
+    other = result['steps']['other']
+    assert other['count'] == expected['steps']['other']['count']
+    assert other['max_delay'] == expected['steps']['other']['max_delay']
+
+
+def test_many_distinct_steps_stay_bounded():
+    data = [{'timestamp': f'2024-01-01T{i % 24:02d}:00:00', 'step': f'step{i}', 'delay': 1} for i in range(5000)]
+    result = analyze_timeseries_windows(data, window='1h', max_points=MAX_POINTS_LIMIT)
+
+    assert len(result['steps']) == 11
+    assert result['folded_steps'] == 4990
+
+
+def test_single_event():
+    data = [{'timestamp': '2024-01-01T10:30:00Z', 'step': 'Collect', 'delay': 2.5}]
+    result = analyze_timeseries_windows(data, window='1h', step='15min')
+
+    assert result['windows'] == ['2024-01-01T09:45:00+00:00']
+    assert result['event_counts'] == [1]
+    assert result['throughput'] == [4.0]
+    assert result['anomaly_counts'] == [0]
+    assert result['steps'] == {'Collect': {'count': [1], 'mean_delay': [2.5], 'max_delay': [2.5]}}
+
+
+def test_accepts_event_store():
+    data = make_events(200)
+    store = EventStore.from_records(data, delay_dtype=np.float64)
+    assert analyze_timeseries_windows(store, window='2h') == analyze_timeseries_windows(data, window='2h')
+
+
+@pytest.mark.parametrize('kwargs, message', [
+    ({'window': 'often'}, "Invalid window 'often'"),
+    ({'window': '-1h'}, 'Window must be positive'),
+    ({'window': '1h', 'step': '2h'}, 'Step must not be longer than the window'),
+    ({'window': '1h', 'step': '25min'}, 'Window must be a whole multiple of step'),
+    ({'max_points': 0}, 'maxPoints must be between 1'),
+    ({'max_points': MAX_POINTS_LIMIT + 1}, 'maxPoints must be between 1'),
+    ({'max_steps': 0}, 'maxSteps must be between 1'),
+    ({'max_steps': MAX_STEPS_LIMIT + 1}, 'maxSteps must be between 1'),
+])
+def test_rejects_invalid_parameters(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        analyze_timeseries_windows(make_events(10), **kwargs)
+
+
+def test_rejects_empty_input():
+    with pytest.raises(ValueError, match='at least one event'):
+        analyze_timeseries_windows([])
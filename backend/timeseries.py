@@ -0,0 +1,192 @@
+"""Windowed time series analysis of process step delays.
+
+Only depends on pandas and numpy so both the BERT and the simplified app can use it.
+"""
+import logging
+import math
+
+import numpy as np
+import pandas as pd
+
+from event_store import EventStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOW = '1h'
+DEFAULT_MAX_POINTS = 200
+MAX_POINTS_LIMIT = 2000
+# The grid and the response are bins x step series; steps beyond maxSteps are folded into one
+# series so a request with thousands of distinct step names stays small
+DEFAULT_MAX_STEPS = 10
+MAX_STEPS_LIMIT = 50
+OTHER_STEP = 'other'
+DEFAULT_ANOMALY_THRESHOLD = 2
+
+
+def _parse_duration(value, name):
+    try:
+        duration = pd.to_timedelta(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid {name} '{value}'. Expected a duration such as '15min', '1h' or '1D'")
+    if duration <= pd.Timedelta(0):
+        raise ValueError(f"{name.capitalize()} must be positive")
+    return duration
+
+
+def _format_duration(duration):
+    """Render a Timedelta back as a short pandas frequency string"""
+    freqstr = pd.tseries.frequencies.to_offset(duration).freqstr
+    return freqstr if freqstr[0].isdigit() else f"1{freqstr}"
+
+
+def _to_list(values):
+    """Convert an array to a JSON friendly list with None for missing values"""
+    return [None if pd.isna(value) else value for value in values.tolist()]
+
+
+def analyze_timeseries_windows(data, window=DEFAULT_WINDOW, step=None, max_points=DEFAULT_MAX_POINTS,
+                               max_steps=DEFAULT_MAX_STEPS, anomaly_threshold=DEFAULT_ANOMALY_THRESHOLD):
+    """Aggregate step delays, throughput and anomalies over time windows.
+
+    ``data`` is a list of event dicts or an ``EventStore``. ``window`` is the window
+    length and ``step`` how far consecutive windows move; windows are tumbling when
+    ``step`` is omitted or equals ``window`` and sliding when it is shorter. Events are
+    bucketed once into ``step`` sized bins straight from the store's columns and the
+    sliding aggregates are rolling sums over those bins, so the cost is
+    O(events + windows). When there would be more than ``max_points`` windows, step and
+    window are widened by the same factor, so sliding windows stay sliding, the response
+    stays small enough to chart directly and ``downsampled`` is set in the result.
+
+    Only the ``max_steps`` steps with the most events get their own series; the rest are
+    summed into one ``'other'`` series and counted in ``folded_steps``. Together with
+    ``max_points`` this bounds the grid at ``max_points x (max_steps + 1)`` cells.
+
+    Leading sliding windows that start before the first bin only cover part of their
+    length; their throughput is divided by the hours actually covered.
+
+    An event is an anomaly when its delay is more than ``anomaly_threshold`` standard
+    deviations away from the mean delay of its step.
+    """
+    try:
+        window = _parse_duration(window, 'window')
+        step = _parse_duration(step, 'step') if step else window
+        if step > window:
+            raise ValueError("Step must not be longer than the window")
+        if window % step != pd.Timedelta(0):
+            raise ValueError("Window must be a whole multiple of step")
+        max_points = int(max_points)
+        if not 1 <= max_points <= MAX_POINTS_LIMIT:
+            raise ValueError(f"maxPoints must be between 1 and {MAX_POINTS_LIMIT}")
+        max_steps = int(max_steps)
+        if not 1 <= max_steps <= MAX_STEPS_LIMIT:
+            raise ValueError(f"maxSteps must be between 1 and {MAX_STEPS_LIMIT}")
+        anomaly_threshold = float(anomaly_threshold)
+
+        # Request data keeps float64 delays; long lived stores hold float32
+        events = data if isinstance(data, EventStore) else EventStore.from_records(data, delay_dtype=np.float64)
+        if not len(events):
+            raise ValueError("Input data must contain at least one event")
+        events = events.sorted()
+        timestamps = events.timestamps
+        step_ids = events.step_ids
+        delays = events.delays.astype(np.float64)
+        n_steps = len(events.steps)
+
+        # Downsample by widening step and window by the same factor until the number of
+        # step aligned bins fits max_points; keeping the ratio keeps sliding windows sliding
+        def bin_count(step_ns):
+            return int(timestamps[-1] // step_ns - timestamps[0] // step_ns) + 1
+
+        bins_per_window = int(window // step)
+        downsampled = bin_count(step.value) > max_points
+        if downsampled:
+            factor = math.ceil(bin_count(step.value) / max_points)
+            while bin_count(step.value * factor) > max_points:
+                factor += 1
+            step = step * factor
+            window = window * factor
+
+        # Flag anomalies against each step's own delay distribution
+        step_counts = np.bincount(step_ids, minlength=n_steps)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            step_means = np.bincount(step_ids, weights=delays, minlength=n_steps) / step_counts
+            deviations = np.abs(delays - step_means[step_ids])
+            step_stds = np.sqrt(np.bincount(step_ids, weights=deviations ** 2, minlength=n_steps) / step_counts)
+            anomalies = deviations / step_stds[step_ids] > anomaly_threshold
+
+        # Bucket events into step sized bins on a complete, gap free grid
+        step_ns = step.value
+        first_bin = timestamps[0] // step_ns * step_ns
+        bins = (timestamps - first_bin) // step_ns
+        n_bins = int(bins[-1]) + 1
+        grid = pd.date_range(pd.Timestamp(first_bin, unit='ns', tz='UTC'), periods=n_bins, freq=step)
+        # Map each step to an output column: the busiest max_steps keep their own column
+        # (in first seen order) and the rest share a trailing 'other' column
+        present = np.flatnonzero(step_counts)
+        folded_steps = max(0, len(present) - max_steps)
+        if folded_steps:
+            busiest = present[np.argsort(-step_counts[present], kind='stable')[:max_steps]]
+            kept = np.sort(busiest)
+            names = [events.steps[i] for i in kept]
+            other = OTHER_STEP
+            while other in names:
+                other = f'_{other}'
+            names.append(other)
+        else:
+            kept = present
+            names = [events.steps[i] for i in kept]
+        column_of = np.full(n_steps, len(kept))
+        column_of[kept] = np.arange(len(kept))
+        n_columns = len(names)
+        cells = bins * n_columns + column_of[step_ids]
+        n_cells = n_bins * n_columns
+
+        def per_step(values):
+            return pd.DataFrame(values.reshape(n_bins, n_columns), index=grid, columns=names)
+
+        cell_counts = per_step(np.bincount(cells, minlength=n_cells).astype(np.float64))
+        cell_sums = per_step(np.bincount(cells, weights=delays, minlength=n_cells))
+        cell_max = np.full(n_cells, np.nan)
+        max_per_cell = pd.Series(delays).groupby(cells).max()
+        cell_max[max_per_cell.index] = max_per_cell.to_numpy()
+        cell_max = per_step(cell_max)
+        bin_counts = pd.Series(np.bincount(bins, minlength=n_bins), index=grid)
+        bin_anomalies = pd.Series(np.bincount(bins, weights=anomalies, minlength=n_bins), index=grid)
+
+        # Sliding aggregates: rolling sums/max over bins_per_window consecutive bins
+        rolling = dict(window=bins_per_window, min_periods=1)
+        counts = cell_counts.rolling(**rolling).sum()
+        sums = cell_sums.rolling(**rolling).sum()
+        maxima = cell_max.rolling(**rolling).max()
+        means = sums / counts.replace(0, np.nan)
+        event_counts = bin_counts.rolling(**rolling).sum()
+        anomaly_counts = bin_anomalies.rolling(**rolling).sum()
+
+        # Hours of each window that lie on the grid: the first windows are only partly covered
+        covered_bins = np.minimum(np.arange(1, len(grid) + 1), bins_per_window)
+        hours = covered_bins * (step / pd.Timedelta(hours=1))
+        window_starts = grid - (bins_per_window - 1) * step
+
+        steps = {}
+        for name in counts.columns:
+            steps[name] = {
+                'count': counts[name].astype(int).tolist(),
+                'mean_delay': _to_list(means[name].round(4)),
+                'max_delay': _to_list(maxima[name].round(4)),
+            }
+
+        return {
+            'window': _format_duration(window),
+            'step': _format_duration(step),
+            'downsampled': downsampled,
+            'folded_steps': folded_steps,
+            'windows': [start.isoformat() for start in window_starts],
+            'event_counts': event_counts.astype(int).tolist(),
+            'throughput': (event_counts / hours).round(4).tolist(),
+            'anomaly_counts': anomaly_counts.astype(int).tolist(),
+            'steps': steps,
+        }
+
+    except Exception as e:
+        logger.error(f"Error in windowed time series analysis: {str(e)}")
+        raise ValueError(str(e))
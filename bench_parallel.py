@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""Scaling benchmark for parallel preprocessing and batch ingestion.
+
+Runs process_data on a wide frame and ingest_batch on several files with 1 to N
+workers, checks every run matches the serial output and prints the speedup.
+
+Usage: python bench_parallel.py [--max-workers N] [--backend thread|process]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+from preprocessing import process_data, ingest_batch  # noqa: E402
+
+STEPS = {
+    'handle_missing': {'strategy': 'mode'},
+    'normalize': {'method': 'standard'},
+    'encode_categorical': {'method': 'label'},
+}
+
+
+def make_frame(rows, columns, seed=0):
+    rng = np.random.default_rng(seed)
+    data = rng.normal(size=(rows, columns))
+    data[rng.random(size=data.shape) < 0.05] = np.nan
+    df = pd.DataFrame(data, columns=[f'col_{i}' for i in range(columns)])
+    for i in range(max(1, columns // 10)):
+        df[f'cat_{i}'] = rng.choice(['a', 'b', 'c', 'd'], size=rows)
+    return df
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def bench_columns(max_workers, backend, rows, columns, repeat):
+    df = make_frame(rows, columns)
+    print(f"\nprocess_data: {rows} rows x {df.shape[1]} columns ({backend})")
+    baseline, expected = timed(lambda: process_data(df, STEPS), repeat)
+    print(f"  workers=1  {baseline:8.3f}s  speedup 1.00x")
+    for workers in range(2, max_workers + 1):
+        elapsed, result = timed(lambda: process_data(df, STEPS, workers, backend), repeat)
+        assert result == expected, f"parallel output differs from serial with {workers} workers"
+        print(f"  workers={workers:<2} {elapsed:8.3f}s  speedup {baseline / elapsed:.2f}x")
+
+
+def bench_batch(max_workers, backend, files, rows, columns, repeat):
+    with tempfile.TemporaryDirectory() as tmpdir:
+        jobs = []
+        for i in range(files):
+            filepath = os.path.join(tmpdir, f'upload_{i}.csv')
+            make_frame(rows, columns, seed=i).to_csv(filepath, index=False)
+            jobs.append({'filename': f'upload_{i}.csv', 'args': {
+                'filepath': filepath,
+                'data_type': 'csv',
+                'preprocessing_steps': STEPS,
+                'processed_filepath': os.path.join(tmpdir, f'processed_{i}.csv'),
+            }})
+
+        print(f"\ningest_batch: {files} files of {rows} rows x {columns} columns ({backend})")
+        baseline, expected = timed(lambda: ingest_batch(jobs), repeat)
+        print(f"  workers=1  {baseline:8.3f}s  speedup 1.00x")
+        for workers in range(2, max_workers + 1):
+            elapsed, result = timed(lambda: ingest_batch(jobs, workers, backend), repeat)
+            assert result == expected, f"parallel batch output differs from serial with {workers} workers"
+            print(f"  workers={workers:<2} {elapsed:8.3f}s  speedup {baseline / elapsed:.2f}x")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--backend', choices=['thread', 'process'], default='process')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--columns', type=int, default=300)
+    parser.add_argument('--files', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"CPU cores available: {os.cpu_count()}")
+    bench_columns(args.max_workers, args.backend, args.rows, args.columns, args.repeat)
+    bench_batch(args.max_workers, args.backend, args.files, args.rows // 4, args.columns // 4, args.repeat)
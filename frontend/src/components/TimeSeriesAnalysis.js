@@ -8,13 +8,16 @@ import {
     TextField,
     Button,
     CircularProgress,
+    MenuItem,
 } from '@mui/material';
-import { Bar } from 'react-chartjs-2';
+import { Bar, Line } from 'react-chartjs-2';
 import {
     Chart as ChartJS,
     CategoryScale,
     LinearScale,
     BarElement,
+    PointElement,
+    LineElement,
     Title,
     Tooltip,
     Legend,
@@ -27,11 +30,22 @@ ChartJS.register(
     CategoryScale,
     LinearScale,
     BarElement,
+    PointElement,
+    LineElement,
     Title,
     Tooltip,
     Legend
 );
 
+const STEP_COLORS = [
+    'rgb(54, 162, 235)',
+    'rgb(255, 99, 132)',
+    'rgb(75, 192, 192)',
+    'rgb(255, 159, 64)',
+    'rgb(153, 102, 255)',
+    'rgb(201, 203, 207)'
+];
+
 const TimeSeriesAnalysis = () => {
     const [data, setData] = useState('');
     const [loading, setLoading] = useState(false);
@@ -39,16 +53,25 @@ const TimeSeriesAnalysis = () => {
     const [analysis, setAnalysis] = useState(null);
     const [windowSize, setWindowSize] = useState(5);
     const [forecastSteps, setForecastSteps] = useState(3);
+    const [mode, setMode] = useState('static');
+    const [windowLength, setWindowLength] = useState('1h');
+    const [slideStep, setSlideStep] = useState('');
 
     const handleAnalyze = async () => {
         try {
             setLoading(true);
             setError('');
-            const response = await axios.post(`${API_URL}/api/analyze-timeseries`, {
+            const payload = {
                 data: JSON.parse(data),
                 windowSize: windowSize,
                 forecastSteps: forecastSteps
-            });
+            };
+            if (mode === 'windowed') {
+                payload.mode = 'windowed';
+                payload.window = windowLength;
+                if (slideStep) payload.step = slideStep;
+            }
+            const response = await axios.post(`${API_URL}/api/analyze-timeseries`, payload);
             setAnalysis(response.data);
         } catch (err) {
             setError(err.response?.data?.error || 'Error analyzing data');
@@ -102,6 +125,91 @@ const TimeSeriesAnalysis = () => {
         );
     };
 
+    const renderWindowedGraphs = () => {
+        if (!analysis?.windows) return null;
+
+        const labels = analysis.windows.map(w => new Date(w).toLocaleString());
+
+        const delayData = {
+            labels,
+            datasets: Object.entries(analysis.steps).map(([name, values], index) => ({
+                label: name,
+                data: values.mean_delay,
+                borderColor: STEP_COLORS[index % STEP_COLORS.length],
+                backgroundColor: STEP_COLORS[index % STEP_COLORS.length],
+                spanGaps: true,
+                pointRadius: 2
+            }))
+        };
+
+        const delayOptions = {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                title: {
+                    display: true,
+                    text: `Mean Delay per Step (${analysis.window} windows every ${analysis.step}${analysis.downsampled ? ', downsampled' : ''}${analysis.folded_steps ? `, ${analysis.folded_steps} smaller steps grouped as other` : ''})`
+                }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    title: {
+                        display: true,
+                        text: 'Delay (hours)'
+                    }
+                }
+            }
+        };
+
+        const throughputData = {
+            labels,
+            datasets: [
+                {
+                    label: 'Throughput (events/hour)',
+                    data: analysis.throughput,
+                    backgroundColor: 'rgba(54, 162, 235, 0.5)',
+                    borderColor: 'rgb(54, 162, 235)',
+                    borderWidth: 1
+                },
+                {
+                    label: 'Anomalies',
+                    data: analysis.anomaly_counts,
+                    backgroundColor: 'rgba(255, 99, 132, 0.5)',
+                    borderColor: 'rgb(255, 99, 132)',
+                    borderWidth: 1
+                }
+            ]
+        };
+
+        const throughputOptions = {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                title: {
+                    display: true,
+                    text: 'Throughput and Anomalies per Window'
+                }
+            },
+            scales: {
+                y: {
+                    beginAtZero: true
+                }
+            }
+        };
+
+        return (
+            <>
+                <Box sx={{ height: 300, mt: 2 }}>
+                    <Line data={delayData} options={delayOptions} />
+                </Box>
+                <Box sx={{ height: 300, mt: 2 }}>
+                    <Bar data={throughputData} options={throughputOptions} />
+                </Box>
+            </>
+        );
+    };
+
     return (
         <Box sx={{ p: { xs: 2, sm: 3 } }}>
             <Typography variant="h4" gutterBottom sx={{
@@ -141,6 +249,38 @@ const TimeSeriesAnalysis = () => {
                                         helperText={error}
                                     />
                                 </Grid>
+                                <Grid item xs={12}>
+                                    <TextField
+                                        fullWidth
+                                        select
+                                        label="Analysis Mode"
+                                        value={mode}
+                                        onChange={(e) => setMode(e.target.value)}
+                                    >
+                                        <MenuItem value="static">Bottlenecks</MenuItem>
+                                        <MenuItem value="windowed">Trends over Time Windows</MenuItem>
+                                    </TextField>
+                                </Grid>
+                                {mode === 'windowed' && (
+                                    <>
+                                        <Grid item xs={12} sm={6}>
+                                            <TextField
+                                                fullWidth
+                                                label="Window (e.g. 1h, 1D)"
+                                                value={windowLength}
+                                                onChange={(e) => setWindowLength(e.target.value)}
+                                            />
+                                        </Grid>
+                                        <Grid item xs={12} sm={6}>
+                                            <TextField
+                                                fullWidth
+                                                label="Slide Step (empty = tumbling)"
+                                                value={slideStep}
+                                                onChange={(e) => setSlideStep(e.target.value)}
+                                            />
+                                        </Grid>
+                                    </>
+                                )}
                                 <Grid item xs={12} sm={6}>
                                     <TextField
                                         fullWidth
@@ -196,6 +336,7 @@ const TimeSeriesAnalysis = () => {
                             {analysis ? (
                                 <Box sx={{ height: '100%', minHeight: 300 }}>
                                     {renderBottleneckGraph()}
+                                    {renderWindowedGraphs()}
                                 </Box>
                             ) : (
                                 <Box sx={{